@@ -1,23 +1,45 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, render_template, send_from_directory, url_for
 from flask_cors import CORS
 import json
+import orjson
 from werkzeug.utils import secure_filename
 from model_evaluator import ModelEvaluator
 from llm_analyzer import LLMAnalyzer
+from file_utils import save_file_by_content, read_csv_fast, read_excel_fast, count_csv_rows
+from record_store import RecordStore
 import os
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
+import pyarrow.parquet as pq
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, recall_score, f1_score, confusion_matrix, precision_score
 import seaborn as sns
 import matplotlib.pyplot as plt
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.svm import SVC
 import io
 import base64
 from tensorflow import keras
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import queue
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ProcessPoolExecutor
+
+# Log records are queued by request handlers and written by a background thread
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, logging.StreamHandler())
+log_listener.start()
+atexit.register(log_listener.stop)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(), handlers=[QueueHandler(log_queue)])
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -25,6 +47,11 @@ CORS(app)  # Enable CORS for all routes
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'h5', 'pt', 'pth', 'pkl', 'onnx', 'csv', 'xlsx', 'xls', 'json'}
+ALLOWED_EXTENSIONS_BY_TYPE = {
+    'model': frozenset({'h5', 'pt', 'pth', 'pkl', 'onnx'}),
+    'dataset': frozenset({'csv', 'xlsx', 'xls'}),
+    'llm_test': frozenset({'json'})
+}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -32,39 +59,250 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 evaluator = ModelEvaluator()
 llm_analyzer = LLMAnalyzer()
 
-# In-memory storage for demonstration purposes
-# In a production environment, you would use a database
-benchmark_results = []
-model_library = []
+# Benchmark results and saved models are persisted in SQLite and read back
+# from it on every request
+STORE_DB_PATH = os.path.join(UPLOAD_FOLDER, 'store.db')
+benchmark_results = RecordStore(STORE_DB_PATH, 'benchmark_results')
+model_library = RecordStore(STORE_DB_PATH, 'model_library')
 
 # Global variables to store the data and model
-global_dataset = None
+# Only the uploaded file's path and header are kept between requests; the
+# full dataset is read lazily when it is actually needed (e.g. /train).
+global_dataset_path = None
+global_columns = []
 global_target = None
 
+# Rows parsed per chunk when streaming CSV files
+CSV_CHUNKSIZE = 500_000
+# Rows sampled to infer column dtypes and build previews
+SCHEMA_SAMPLE_ROWS = 1000
+# Blank cells of text columns are missing values, as in pandas
+CSV_CONVERT_OPTIONS = pa_csv.ConvertOptions(strings_can_be_null=True)
+# Rows per chunk when training incrementally; every STREAM_TEST_EVERY-th
+# row is held out for evaluation
+TRAIN_CHUNKSIZE = 200_000
+STREAM_TEST_EVERY = 5
+
+# Training runs in worker processes; jobs are polled via /train/<job_id>.
+# Jobs live in this process, so the app is served by a single worker process
+# Workers are spawned rather than forked from this multi-threaded process
+training_executor = ProcessPoolExecutor(
+    max_workers=int(os.environ.get('TRAINING_WORKERS', 2)),
+    mp_context=multiprocessing.get_context('spawn')
+)
+training_jobs = {}
+# Finished jobs kept for polling; older ones are evicted when new jobs start
+MAX_FINISHED_TRAINING_JOBS = 100
+
+# Categorical dtypes of feature columns, keyed by dataset identity, so repeat
+# trainings on the same file skip discovering the categories again. Each
+# training worker has its own copy, bounded to the most recently used datasets
+CATEGORY_DTYPE_CACHE_SIZE = 4
+category_dtype_cache = OrderedDict()
+
+def json_default(obj):
+    """Serialize pandas values orjson does not support, such as dates read from Excel."""
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def ojsonify(obj):
+    """Serialize obj to a JSON response with orjson (numpy and pandas values included)."""
+    return app.response_class(
+        orjson.dumps(obj, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+        mimetype='application/json'
+    )
+
 def allowed_file(filename, file_type):
     """Check if the file extension is allowed."""
-    if not filename or '.' not in filename:
-        print(f"Invalid filename: {filename}")
+    if not filename:
         return False
+    extension = os.path.splitext(filename)[1][1:].lower()
+    return extension in ALLOWED_EXTENSIONS_BY_TYPE.get(file_type, ())
+
+def parquet_path_for(csv_path):
+    """Path of the parquet copy written next to an uploaded CSV file."""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+def has_fresh_parquet(csv_path):
+    """Whether a parquet copy exists that is not older than the CSV file."""
+    parquet_path = parquet_path_for(csv_path)
+    return os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+def convert_csv_to_parquet(csv_path):
+    """Stream a CSV file into a zstd-compressed parquet file and return its path."""
+    parquet_path = parquet_path_for(csv_path)
+    # Write to a temporary file so a conversion that fails midway (e.g. a type
+    # change after the first block) never leaves a truncated but valid parquet
+    tmp_path = f"{parquet_path}.{os.urandom(8).hex()}.part"
+    try:
+        reader = pa_csv.open_csv(csv_path, convert_options=CSV_CONVERT_OPTIONS)
+        with pq.ParquetWriter(tmp_path, reader.schema, compression='zstd') as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        os.replace(tmp_path, parquet_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return parquet_path
+
+def read_parquet(parquet_path, columns=None):
+    """Read a parquet file through a memory map, releasing Arrow buffers as they convert."""
+    table = pq.read_table(parquet_path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def downcast_numeric_columns(df):
+    """Downcast numeric columns to the smallest dtype that holds their values."""
+    for column in df.select_dtypes(include='integer').columns:
+        df[column] = pd.to_numeric(df[column], downcast='integer')
+    for column in df.select_dtypes(include='floating').columns:
+        df[column] = pd.to_numeric(df[column], downcast='float')
+    return df
+
+def load_training_dataset(dataset_path):
+    """Read a training dataset (parquet or CSV) into memory."""
+    if dataset_path.endswith('.parquet'):
+        df = read_parquet(dataset_path)
+    else:
+        df = read_csv_fast(dataset_path)
+    return downcast_numeric_columns(df)
+
+def iter_dataset_chunks(dataset_path, chunksize):
+    """Yield a dataset in DataFrame chunks indexed by row position in the file."""
+    if dataset_path.endswith('.parquet'):
+        offset = 0
+        for batch in pq.ParquetFile(dataset_path, memory_map=True).iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+    else:
+        yield from pd.read_csv(dataset_path, chunksize=chunksize)
+
+def dataset_cache_key(dataset_path):
+    """Identify a dataset file by path, modification time and size."""
+    stat = os.stat(dataset_path)
+    return (os.path.abspath(dataset_path), stat.st_mtime_ns, stat.st_size)
+
+def encode_categorical_columns(X, dataset_path):
+    """Replace object and datetime columns of X with integer category codes."""
+    categorical_columns = X.select_dtypes(include=['object', 'datetime']).columns
+    if len(categorical_columns) == 0:
+        return X
+    
+    key = dataset_cache_key(dataset_path)
+    dtypes = category_dtype_cache.setdefault(key, {})
+    category_dtype_cache.move_to_end(key)
+    while len(category_dtype_cache) > CATEGORY_DTYPE_CACHE_SIZE:
+        category_dtype_cache.popitem(last=False)
+    for column in categorical_columns:
+        if column not in dtypes:
+            dtypes[column] = X[column].astype('category').dtype
+    
+    X[categorical_columns] = X[categorical_columns].astype(
+        {column: dtypes[column] for column in categorical_columns}
+    ).apply(lambda c: c.cat.codes.astype(np.int32))
+    return X
+
+def fit_stream_encoders(dataset_path, target_column):
+    """Collect categorical feature values and target classes in one pass over the dataset."""
+    feature_values = {}
+    target_values = set()
+    target_is_object = False
+    for chunk in iter_dataset_chunks(dataset_path, TRAIN_CHUNKSIZE):
+        for column in chunk.select_dtypes(include=['object', 'datetime']).columns:
+            if column != target_column:
+                feature_values.setdefault(column, set()).update(chunk[column].astype(str).unique())
+        target = chunk[target_column]
+        if target.dtype == 'object':
+            target_is_object = True
+            target = target.astype(str)
+        target_values.update(target.unique())
+    
+    return {
+        'features': {column: pd.CategoricalDtype(sorted(values)) for column, values in feature_values.items()},
+        'target': pd.CategoricalDtype(sorted(map(str, target_values))) if target_is_object else None,
+        'classes': np.arange(len(target_values)) if target_is_object else np.array(sorted(target_values))
+    }
+
+def encode_stream_chunk(chunk, target_column, encoders):
+    """Encode one dataset chunk with the encoders from fit_stream_encoders."""
+    # The chunk is not used again, so the target is popped instead of copying the features
+    y = chunk.pop(target_column)
+    X = chunk
+    for column, dtype in encoders['features'].items():
+        X[column] = X[column].astype(str).astype(dtype).cat.codes
+    if encoders['target'] is not None:
+        y = y.astype(str).astype(encoders['target']).cat.codes
+    
+    # Deterministic hold-out split based on the row position in the file
+    is_test = (chunk.index.to_numpy() % STREAM_TEST_EVERY) == 0
+    return X, y.to_numpy(), is_test
+
+def train_streaming(dataset_path, target_column):
+    """Train an SGDClassifier with partial_fit over dataset chunks.
 
-    extension = filename.rsplit('.', 1)[1].lower()
-    print(f"Checking file: {filename}, type: {file_type}, extension: {extension}")
-
-    if file_type == 'model':
-        allowed = extension in {'h5', 'pt', 'pth', 'pkl', 'onnx'}
-        print(f"Model file check - Extension: {extension}, Allowed: {allowed}")
-        return allowed
-    elif file_type == 'dataset':
-        allowed = extension in {'csv', 'xlsx', 'xls'}
-        print(f"Dataset file check - Extension: {extension}, Allowed: {allowed}")
-        return allowed
-    elif file_type == 'llm_test':
-        allowed = extension == 'json'
-        print(f"LLM test file check - Extension: {extension}, Allowed: {allowed}")
-        return allowed
-    
-    print(f"Unknown file type: {file_type}")
-    return False
+    Returns the hold-out labels and predictions.
+    """
+    encoders = fit_stream_encoders(dataset_path, target_column)
+    model = SGDClassifier(random_state=42)
+    for chunk in iter_dataset_chunks(dataset_path, TRAIN_CHUNKSIZE):
+        X, y, is_test = encode_stream_chunk(chunk, target_column, encoders)
+        if (~is_test).any():
+            model.partial_fit(X[~is_test], y[~is_test], classes=encoders['classes'])
+    
+    y_test, y_pred = [], []
+    for chunk in iter_dataset_chunks(dataset_path, TRAIN_CHUNKSIZE):
+        X, y, is_test = encode_stream_chunk(chunk, target_column, encoders)
+        if is_test.any():
+            y_test.append(y[is_test])
+            y_pred.append(model.predict(X[is_test]))
+    return np.concatenate(y_test), np.concatenate(y_pred)
+
+def run_training(dataset_path, target_column, model_type):
+    """Train a model on the dataset and return its hold-out metrics."""
+    if model_type == 'sgd':
+        y_test, y_pred = train_streaming(dataset_path, target_column)
+    else:
+        # Prepare the data
+        dataset = load_training_dataset(dataset_path)
+        # Pop the target instead of copying every feature column with drop
+        y = dataset.pop(target_column)
+        X = dataset
+        
+        # Handle categorical variables in features
+        X = encode_categorical_columns(X, dataset_path)
+        # sklearn's trees work on float32; cast once instead of inside fit
+        X = X.astype(np.float32)
+        
+        # Handle categorical target variable
+        if y.dtype == 'object':
+            y, _ = pd.factorize(y, sort=True)
+        
+        # Split the data
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        
+        # Train model, building the trees on all available cores; tree building
+        # releases the GIL, so sklearn's thread-based parallelism is enough
+        model = RandomForestClassifier(n_estimators=100, n_jobs=-1, random_state=42)
+        model.fit(X_train, y_train)
+        
+        # Make predictions
+        y_pred = model.predict(X_test)
+    
+    # Calculate metrics
+    accuracy = accuracy_score(y_test, y_pred)
+    precision = precision_score(y_test, y_pred, average='weighted')
+    f1 = f1_score(y_test, y_pred, average='weighted')
+    
+    return {
+        'accuracy': round(accuracy * 100, 2),
+        'precision': round(precision * 100, 2),
+        'f1_score': round(f1 * 100, 2)
+    }
 
 @app.route('/')
 def home():
@@ -72,170 +310,189 @@ def home():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    global global_dataset
+    global global_dataset_path, global_columns
     if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'})
+        return ojsonify({'error': 'No file uploaded'})
     
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'error': 'No file selected'})
+        return ojsonify({'error': 'No file selected'})
     
     if file and file.filename.endswith('.csv'):
         try:
-            # Read the CSV file
-            global_dataset = pd.read_csv(file)
+            # Save the CSV file so it can be streamed instead of held in memory,
+            # named by its content so a re-upload reuses the file and its parquet copy
+            filepath = save_file_by_content(file, app.config['UPLOAD_FOLDER'], 'dataset')
+            
+            # Only the first chunk is needed for the columns and preview
+            with pd.read_csv(filepath, chunksize=CSV_CHUNKSIZE, low_memory=True) as reader:
+                first = next(reader)
             
             # Get column names
-            columns = global_dataset.columns.tolist()
+            columns = first.columns.tolist()
             
             # Get first few rows for preview
-            preview = global_dataset.head().to_html(classes='table table-striped')
+            preview = first.head().to_html(classes='table table-striped')
+            
+            # Keep a parquet copy for training; the OS page cache then manages
+            # residency and columns that are not read are never decompressed
+            try:
+                if has_fresh_parquet(filepath):
+                    global_dataset_path = parquet_path_for(filepath)
+                else:
+                    global_dataset_path = convert_csv_to_parquet(filepath)
+            except pa.ArrowInvalid as e:
+                app.logger.error("Could not convert %s to parquet, training from CSV: %s", filepath, e)
+                global_dataset_path = filepath
+            global_columns = columns
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'columns': columns,
                 'preview': preview
             })
         except Exception as e:
-            return jsonify({'error': f'Error processing file: {str(e)}'})
+            return ojsonify({'error': f'Error processing file: {str(e)}'})
     
-    return jsonify({'error': 'Invalid file format'})
+    return ojsonify({'error': 'Invalid file format'})
 
 @app.route('/train', methods=['POST'])
 def train():
-    global global_dataset
-    
-    if global_dataset is None:
-        return jsonify({'error': 'No dataset uploaded'})
+    if global_dataset_path is None:
+        return ojsonify({'error': 'No dataset uploaded'})
     
     try:
         # Get target column from request
         target_column = request.json.get('target_column')
-        if target_column not in global_dataset.columns:
-            return jsonify({'error': 'Invalid target column'})
-        
-        # Prepare the data
-        X = global_dataset.drop(target_column, axis=1)
-        y = global_dataset[target_column]
-        
-        # Handle categorical variables in features
-        categorical_columns = X.select_dtypes(include=['object']).columns
-        for column in categorical_columns:
-            le = LabelEncoder()
-            X[column] = le.fit_transform(X[column].astype(str))
+        if target_column not in global_columns:
+            return ojsonify({'error': 'Invalid target column'})
         
-        # Handle categorical target variable
-        if y.dtype == 'object':
-            le = LabelEncoder()
-            y = le.fit_transform(y)
+        # 'random_forest' trains in memory, 'sgd' streams the CSV in chunks
+        model_type = request.json.get('model_type', 'random_forest')
+        if model_type not in ('random_forest', 'sgd'):
+            return ojsonify({'error': f'Unsupported model type: {model_type}'})
         
-        # Split the data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Train model (using Random Forest as an example)
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        # Train in a worker process so the request returns immediately
+        evict_finished_training_jobs()
+        job_id = os.urandom(8).hex()
+        training_jobs[job_id] = training_executor.submit(
+            run_training, global_dataset_path, target_column, model_type
+        )
         
-        # Make predictions
-        y_pred = model.predict(X_test)
-        
-        # Calculate metrics
-        accuracy = accuracy_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred, average='weighted')
-        f1 = f1_score(y_test, y_pred, average='weighted')
-        
-        return jsonify({
+        return ojsonify({
             'success': True,
-            'metrics': {
-                'accuracy': round(accuracy * 100, 2),
-                'precision': round(precision * 100, 2),
-                'f1_score': round(f1 * 100, 2)
-            }
-        })
+            'job_id': job_id
+        }), 202
         
     except Exception as e:
-        return jsonify({'error': f'Error during training: {str(e)}'})
+        return ojsonify({'error': f'Error during training: {str(e)}'})
+
+def evict_finished_training_jobs():
+    """Drop the oldest finished jobs beyond MAX_FINISHED_TRAINING_JOBS."""
+    finished = [job_id for job_id, job in training_jobs.items() if job.done()]
+    for job_id in finished[:max(len(finished) - MAX_FINISHED_TRAINING_JOBS, 0)]:
+        del training_jobs[job_id]
+
+@app.route('/train/<job_id>', methods=['GET'])
+def training_status(job_id):
+    job = training_jobs.get(job_id)
+    if job is None:
+        return ojsonify({'error': 'Unknown training job'}), 404
+    
+    if not job.done():
+        return ojsonify({'status': 'running', 'job_id': job_id})
+    
+    try:
+        return ojsonify({'success': True, 'status': 'done', 'metrics': job.result()})
+    except Exception as e:
+        return ojsonify({'error': f'Error during training: {str(e)}'})
 
 @app.route('/api/upload/model', methods=['POST'])
 def upload_model():
-    print("Received model upload request")
-    print("Files in request:", list(request.files.keys()))
+    app.logger.debug("Received model upload request")
+    if app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug("Files in request: %s", list(request.files.keys()))
     
     if 'file' not in request.files:
-        print("No file part in request")
-        return jsonify({'error': 'No file part'}), 400
+        app.logger.debug("No file part in request")
+        return ojsonify({'error': 'No file part'}), 400
     
     file = request.files['file']
-    print(f"Received file: {file.filename}, Content Type: {file.content_type}")
+    app.logger.debug("Received file: %s, Content Type: %s", file.filename, file.content_type)
     
     if file.filename == '':
-        print("No selected file (empty filename)")
-        return jsonify({'error': 'No selected file'}), 400
+        app.logger.debug("No selected file (empty filename)")
+        return ojsonify({'error': 'No selected file'}), 400
     
     if not allowed_file(file.filename, 'model'):
-        print(f"Invalid file type: {file.filename}")
-        return jsonify({'error': 'Invalid file type. Supported formats: .h5, .pt, .pth, .pkl, .onnx'}), 400
+        app.logger.debug("Invalid file type: %s", file.filename)
+        return ojsonify({'error': 'Invalid file type. Supported formats: .h5, .pt, .pth, .pkl, .onnx'}), 400
     
     try:
         # Log the upload attempt
-        print(f"Attempting to upload model: {file.filename}")
+        app.logger.debug("Attempting to upload model: %s", file.filename)
         filepath = evaluator.save_uploaded_file(file, 'model')
-        print(f"Model saved successfully at: {filepath}")
-        return jsonify({
+        app.logger.debug("Model saved successfully at: %s", filepath)
+        return ojsonify({
             'message': 'Model uploaded successfully',
             'filepath': filepath
         }), 201
     except Exception as e:
-        print(f"Error uploading model: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        app.logger.error("Error uploading model: %s", e)
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/api/upload-dataset', methods=['POST'])
 def upload_dataset():
-    print("Received dataset upload request")
+    app.logger.debug("Received dataset upload request")
     
     if 'file' not in request.files:
-        print("No file part in request")
-        return jsonify({'error': 'No file uploaded'}), 400
+        app.logger.debug("No file part in request")
+        return ojsonify({'error': 'No file uploaded'}), 400
     
     file = request.files['file']
-    print(f"Received file: {file.filename}, Content Type: {file.content_type}")
+    app.logger.debug("Received file: %s, Content Type: %s", file.filename, file.content_type)
     
     if file.filename == '':
-        print("No selected file (empty filename)")
-        return jsonify({'error': 'No file selected'}), 400
+        app.logger.debug("No selected file (empty filename)")
+        return ojsonify({'error': 'No file selected'}), 400
     
     if not allowed_file(file.filename, 'dataset'):
-        print(f"Invalid file type: {file.filename}")
-        return jsonify({'error': 'Invalid file type. Supported formats: .csv, .xlsx, .xls'}), 400
+        app.logger.debug("Invalid file type: %s", file.filename)
+        return ojsonify({'error': 'Invalid file type. Supported formats: .csv, .xlsx, .xls'}), 400
     
     try:
         # Create uploads directory if it doesn't exist
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
         
-        # Save the uploaded file with a secure filename
+        # Save the uploaded file under its content hash; an identical re-upload
+        # reuses the file, keeping its mtime and the evaluator's dataset cache
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        print(f"File saved at: {filepath}")
+        filepath = save_file_by_content(file, app.config['UPLOAD_FOLDER'], 'dataset')
+        app.logger.debug("File saved at: %s", filepath)
         
         # Read the dataset to get information
         if filepath.endswith('.csv'):
-            df = pd.read_csv(filepath)
+            # Infer the schema from a sample instead of parsing the whole file
+            df = pd.read_csv(filepath, nrows=SCHEMA_SAMPLE_ROWS)
+            num_rows = count_csv_rows(filepath)
         elif filepath.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(filepath)
+            df = read_excel_fast(filepath)
+            num_rows = len(df)
         else:
             raise ValueError("Unsupported file format")
-            
-        print(f"Dataset loaded successfully. Shape: {df.shape}")
-        print(f"Columns: {df.columns.tolist()}")
+        
+        shape = (num_rows, df.shape[1])
+        app.logger.debug("Dataset loaded successfully. Shape: %s", shape)
+        if app.logger.isEnabledFor(logging.DEBUG):
+            app.logger.debug("Columns: %s", df.columns.tolist())
         
         # Get dataset information
         dataset_info = {
             'columns': df.columns.tolist(),
-            'shape': df.shape,
+            'shape': shape,
             'dtypes': df.dtypes.astype(str).to_dict(),
-            'numeric_columns': df.select_dtypes(include=['int64', 'float64']).columns.tolist(),
-            'preview': df.head().to_dict()
+            'numeric_columns': df.select_dtypes(include='number').columns.tolist(),
+            'preview': df.head(5).to_dict(orient='records')
         }
         
         response_data = {
@@ -246,15 +503,68 @@ def upload_dataset():
             **dataset_info
         }
         
-        print(f"Sending response: {response_data}")
-        return jsonify(response_data)
+        app.logger.debug("Sending response: %s", response_data)
+        return ojsonify(response_data)
         
     except Exception as e:
-        print(f"Error processing dataset: {str(e)}")
-        # Clean up the file if there was an error
-        if 'filepath' in locals() and os.path.exists(filepath):
-            os.remove(filepath)
-        return jsonify({'error': f'Error processing dataset: {str(e)}'}), 500
+        app.logger.error("Error processing dataset: %s", e)
+        # The file is not removed: it is stored under its content hash and
+        # may be shared with another upload of the same content
+        return ojsonify({'error': f'Error processing dataset: {str(e)}'}), 500
+
+def analyze_table(table, target_column):
+    """Dataset analysis of an Arrow table."""
+    # Target analysis
+    target_counts = pc.value_counts(table.column(target_column))
+    target_values = target_counts.field('values').to_pylist()
+    counts = target_counts.field('counts').to_pylist()
+    
+    # Calculate class distribution (missing targets are not a class)
+    non_null = sum(c for v, c in zip(target_values, counts) if v is not None)
+    class_distribution = {
+        v: round(c / non_null * 100, 2) for v, c in zip(target_values, counts) if v is not None
+    }
+    
+    # Feature analysis; pyarrow parses dates that pandas would keep as text
+    numeric_features = [
+        field.name for field in table.schema
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    ]
+    categorical_features = [
+        field.name for field in table.schema
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        or pa.types.is_temporal(field.type)
+    ]
+    
+    return {
+        'total_samples': table.num_rows,
+        'num_features': table.num_columns - 1,  # excluding target column
+        'num_classes': len(target_values),
+        'class_distribution': class_distribution,
+        'feature_types': {
+            'numeric': numeric_features,
+            'categorical': categorical_features
+        },
+        # Null counts are stored with each Arrow column
+        'missing_values': {name: table.column(name).null_count for name in table.column_names},
+        'target_column': target_column
+    }
+
+def analyze_frame(df, target_column):
+    """Dataset analysis of a DataFrame, for frames that cannot be converted to Arrow."""
+    target_values = df[target_column]
+    return {
+        'total_samples': len(df),
+        'num_features': len(df.columns) - 1,  # excluding target column
+        'num_classes': len(target_values.unique()),
+        'class_distribution': (target_values.value_counts(normalize=True) * 100).round(2).to_dict(),
+        'feature_types': {
+            'numeric': df.select_dtypes(include='number').columns.tolist(),
+            'categorical': df.select_dtypes(include=['object', 'datetime']).columns.tolist()
+        },
+        'missing_values': df.isnull().sum().to_dict(),
+        'target_column': target_column
+    }
 
 @app.route('/api/analyze-dataset', methods=['POST'])
 def analyze_dataset():
@@ -264,55 +574,34 @@ def analyze_dataset():
         target_column = data.get('target_column')
 
         if not dataset_path or not target_column:
-            return jsonify({'error': 'Dataset path and target column are required'}), 400
+            return ojsonify({'error': 'Dataset path and target column are required'}), 400
 
-        # Load the dataset
-        if dataset_path.endswith('.csv'):
-            df = pd.read_csv(dataset_path)
+        # Load the dataset as an Arrow table; every statistic below is read
+        # from Arrow metadata or computed by Arrow kernels in a single pass
+        if dataset_path.endswith('.csv') and has_fresh_parquet(dataset_path):
+            table = pq.read_table(parquet_path_for(dataset_path), memory_map=True)
+        elif dataset_path.endswith('.csv'):
+            table = pa_csv.read_csv(dataset_path, convert_options=CSV_CONVERT_OPTIONS)
         elif dataset_path.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(dataset_path)
+            df = read_excel_fast(dataset_path)
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                # Mixed-type object columns (e.g. ['A1', 2, 'B3']) have no Arrow type
+                if target_column not in df.columns:
+                    return ojsonify({'error': f'Target column {target_column} not found in dataset'}), 400
+                return ojsonify(analyze_frame(df, target_column))
         else:
-            return jsonify({'error': 'Unsupported file format'}), 400
-
-        if target_column not in df.columns:
-            return jsonify({'error': f'Target column {target_column} not found in dataset'}), 400
+            return ojsonify({'error': 'Unsupported file format'}), 400
 
-        # Basic statistics
-        total_samples = len(df)
-        num_features = len(df.columns) - 1  # excluding target column
-        
-        # Target analysis
-        target_values = df[target_column]
-        num_classes = len(target_values.unique())
-        
-        # Calculate class distribution
-        class_distribution = (target_values.value_counts(normalize=True) * 100).round(2).to_dict()
-        
-        # Feature analysis
-        numeric_features = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
-        categorical_features = df.select_dtypes(include=['object']).columns.tolist()
-        
-        # Missing values analysis
-        missing_values = df.isnull().sum().to_dict()
-
-        analysis_results = {
-            'total_samples': total_samples,
-            'num_features': num_features,
-            'num_classes': num_classes,
-            'class_distribution': class_distribution,
-            'feature_types': {
-                'numeric': numeric_features,
-                'categorical': categorical_features
-            },
-            'missing_values': missing_values,
-            'target_column': target_column
-        }
+        if target_column not in table.column_names:
+            return ojsonify({'error': f'Target column {target_column} not found in dataset'}), 400
 
-        return jsonify(analysis_results)
+        return ojsonify(analyze_table(table, target_column))
 
     except Exception as e:
-        print(f"Error analyzing dataset: {str(e)}")
-        return jsonify({'error': f'Error analyzing dataset: {str(e)}'}), 500
+        app.logger.error("Error analyzing dataset: %s", e)
+        return ojsonify({'error': f'Error analyzing dataset: {str(e)}'}), 500
 
 @app.route('/api/set-target', methods=['POST'])
 def set_target_variable():
@@ -320,19 +609,19 @@ def set_target_variable():
     
     data = request.json
     if not data or 'target_variable' not in data:
-        return jsonify({'error': 'No target variable specified'}), 400
+        return ojsonify({'error': 'No target variable specified'}), 400
     
     target_variable = data['target_variable']
     
-    if global_dataset is None:
-        return jsonify({'error': 'Please upload a dataset first'}), 400
+    if global_dataset_path is None:
+        return ojsonify({'error': 'Please upload a dataset first'}), 400
     
-    if target_variable not in global_dataset.columns:
-        return jsonify({'error': 'Invalid target variable'}), 400
+    if target_variable not in global_columns:
+        return ojsonify({'error': 'Invalid target variable'}), 400
     
     global_target = target_variable
     
-    return jsonify({
+    return ojsonify({
         'success': True,
         'message': f'Target variable set to {target_variable}'
     })
@@ -340,67 +629,130 @@ def set_target_variable():
 @app.route('/api/evaluate-model', methods=['POST'])
 def evaluate_model():
     if 'model_file' not in request.files:
-        return jsonify({'error': 'No model file provided'}), 400
+        return ojsonify({'error': 'No model file provided'}), 400
     
     if 'target_variable' not in request.form:
-        return jsonify({'error': 'No target variable specified'}), 400
+        return ojsonify({'error': 'No target variable specified'}), 400
     
     try:
         model_file = request.files['model_file']
         target_variable = request.form['target_variable']
         
-        # Save the uploaded model file
-        model_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(model_file.filename))
-        model_file.save(model_path)
+        # Save the uploaded model file under its content hash so re-uploads
+        # of the same model hit the evaluator's model cache
+        model_path = evaluator.save_uploaded_file(model_file, 'model')
         
         # Get the dataset path from the request
         dataset_path = request.form.get('dataset_path')
         if not dataset_path:
-            return jsonify({'error': 'Dataset path not provided'}), 400
+            return ojsonify({'error': 'Dataset path not provided'}), 400
             
-        # Use the ModelEvaluator to evaluate the model
-        result = evaluator.evaluate_model(model_path, dataset_path, target_variable)
+        # Use the ModelEvaluator to evaluate the model; ?inline=true forces the
+        # predictions into the response even for large datasets
+        inline = True if request.args.get('inline') == 'true' else None
+        result = evaluator.evaluate_model(model_path, dataset_path, target_variable, inline_predictions=inline)
         
-        # Clean up the temporary model file
-        if os.path.exists(model_path):
-            os.remove(model_path)
-            
+        # The model file is kept (the evaluator bounds how many are stored): an
+        # identical re-upload reuses it and the evaluator's cached model
         if result['status'] == 'error':
-            return jsonify({'error': result['message']}), 500
+            return ojsonify({'error': result['message']}), 500
             
-        return jsonify({
+        return ojsonify({
             'success': True,
             'metrics': result['metrics'],
-            'predictions': result.get('predictions', [])
+            'n_predictions': result['n_predictions'],
+            **predictions_payload(result)
         })
         
     except Exception as e:
-        return jsonify({'error': f'Error evaluating model: {str(e)}'}), 500
+        return ojsonify({'error': f'Error evaluating model: {str(e)}'}), 500
+
+@app.route('/api/batch-evaluate', methods=['POST'])
+def batch_evaluate():
+    model_files = request.files.getlist('model_files')
+    if not model_files:
+        return ojsonify({'error': 'No model files provided'}), 400
+    
+    if 'target_variable' not in request.form:
+        return ojsonify({'error': 'No target variable specified'}), 400
+    
+    dataset_path = request.form.get('dataset_path')
+    if not dataset_path:
+        return ojsonify({'error': 'Dataset path not provided'}), 400
+    
+    try:
+        model_paths = [
+            evaluator.save_uploaded_file(model_file, 'model')
+            for model_file in model_files
+        ]
+        # The dataset is loaded once and shared by all model evaluations
+        inline = True if request.args.get('inline') == 'true' else None
+        result = evaluator.batch_evaluate(model_paths, dataset_path, request.form['target_variable'],
+                                          inline_predictions=inline)
+        
+        if result['status'] == 'error':
+            return ojsonify({'error': result['message']}), 500
+        
+        results = []
+        for model_file, model_path in zip(model_files, model_paths):
+            model_result = dict(result['results'][model_path])
+            model_result.update(predictions_payload(model_result))
+            model_result.pop('predictions_file', None)
+            results.append({'model': model_file.filename, **model_result})
+        
+        return ojsonify({
+            'success': True,
+            'results': results
+        })
+        
+    except Exception as e:
+        return ojsonify({'error': f'Error evaluating models: {str(e)}'}), 500
+
+def predictions_payload(result):
+    """Inline predictions of an evaluation result, or the URL to download them from."""
+    if 'predictions_file' in result:
+        return {'predictions_url': url_for('download_predictions', filename=result['predictions_file'])}
+    if 'predictions' in result:
+        return {'predictions': result['predictions']}
+    return {}
+
+@app.route('/api/predictions/<filename>', methods=['GET'])
+def download_predictions(filename):
+    """Serve a predictions .npy file saved by an evaluation."""
+    return send_from_directory(os.path.abspath(evaluator.predictions_dir), filename, as_attachment=True)
+
+def read_records(store):
+    """Records for a GET request, paginated from SQLite when limit/offset are given."""
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit is None and offset == 0:
+        return store.latest()
+    return store.page(limit if limit is not None else -1, offset)
 
 @app.route('/api/benchmark', methods=['GET', 'POST'])
 def handle_benchmark():
     if request.method == 'POST':
         data = request.json
         benchmark_results.append(data)
-        return jsonify({"message": "Benchmark result saved successfully", "data": data}), 201
+        return ojsonify({"message": "Benchmark result saved successfully", "data": data}), 201
     else:
-        return jsonify(benchmark_results)
+        return ojsonify(read_records(benchmark_results))
 
 @app.route('/api/models', methods=['GET', 'POST'])
 def handle_models():
     if request.method == 'POST':
         data = request.json
         model_library.append(data)
-        return jsonify({"message": "Model saved successfully", "data": data}), 201
+        return ojsonify({"message": "Model saved successfully", "data": data}), 201
     else:
-        return jsonify(model_library)
+        return ojsonify(read_records(model_library))
 
 @app.route('/api/analysis', methods=['POST'])
 def handle_analysis():
     data = request.json
     # Here you would typically perform some analysis on the data
     # For now, we'll just return a mock response
-    return jsonify({
+    return ojsonify({
         "message": "Analysis completed",
         "results": {
             "performance_metrics": {
@@ -415,59 +767,60 @@ def handle_analysis():
 @app.route('/api/llm/upload', methods=['POST'])
 def upload_llm_model():
     if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
+        return ojsonify({'error': 'No file part'}), 400
     
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+        return ojsonify({'error': 'No selected file'}), 400
     
     if not allowed_file(file.filename, 'model'):
-        return jsonify({'error': 'Invalid file type. Supported formats: .h5, .pt, .pth, .pkl, .onnx'}), 400
+        return ojsonify({'error': 'Invalid file type. Supported formats: .h5, .pt, .pth, .pkl, .onnx'}), 400
     
     try:
         # Log the upload attempt
-        print(f"Attempting to upload LLM model: {file.filename}")
+        app.logger.debug("Attempting to upload LLM model: %s", file.filename)
         filepath = llm_analyzer.save_uploaded_file(file, 'llm_model')
         result = llm_analyzer.load_llm_model(filepath)
         if result is not True:
-            return jsonify({'error': result}), 500
-        print(f"LLM model saved successfully at: {filepath}")
-        return jsonify({
+            return ojsonify({'error': result}), 500
+        app.logger.debug("LLM model saved successfully at: %s", filepath)
+        return ojsonify({
             'message': 'LLM model loaded successfully',
             'filepath': filepath
         }), 201
     except Exception as e:
-        print(f"Error uploading LLM model: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        app.logger.error("Error uploading LLM model: %s", e)
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/api/llm/analyze', methods=['POST'])
-def analyze_llm():
+async def analyze_llm():
     try:
         data = request.json
         prompt = data.get('prompt')
         max_length = data.get('max_length', 100)
         
         if not prompt:
-            return jsonify({'error': 'Prompt is required'}), 400
+            return ojsonify({'error': 'Prompt is required'}), 400
         
-        result = llm_analyzer.analyze_text_generation(prompt, max_length)
-        return jsonify(result)
+        # Generation runs in a worker thread so the event loop stays free
+        result = await asyncio.to_thread(llm_analyzer.analyze_text_generation, prompt, max_length)
+        return ojsonify(result)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/api/llm/evaluate', methods=['POST'])
-def evaluate_llm():
+async def evaluate_llm():
     try:
         data = request.json
         test_data = data.get('test_data', [])
         
         if not test_data:
-            return jsonify({'error': 'Test data is required'}), 400
+            return ojsonify({'error': 'Test data is required'}), 400
         
-        result = llm_analyzer.evaluate_llm_performance(test_data)
-        return jsonify(result)
+        result = await asyncio.to_thread(llm_analyzer.evaluate_llm_performance, test_data)
+        return ojsonify(result)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/api/dataset/info/<path:dataset_path>', methods=['GET'])
 def get_dataset_info(dataset_path):
@@ -476,12 +829,12 @@ def get_dataset_info(dataset_path):
         # Ensure the path is within the uploads directory
         full_path = os.path.join(app.config['UPLOAD_FOLDER'], dataset_path)
         if not os.path.exists(full_path):
-            return jsonify({'error': 'Dataset not found'}), 404
+            return ojsonify({'error': 'Dataset not found'}), 404
         
         dataset_info = evaluator.get_dataset_info(full_path)
-        return jsonify(dataset_info)
+        return ojsonify(dataset_info)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
     app.run(debug=True, port=3000) 
\ No newline at end of file
@@ -0,0 +1,100 @@
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import xxhash
+
+    def _content_hasher():
+        return xxhash.xxh3_128()
+except ImportError:
+    def _content_hasher():
+        return hashlib.blake2b(digest_size=16)
+
+# Block size used when copying uploads to disk; large blocks keep the
+# number of read/write syscalls low for multi-GB model files
+COPY_BUFFER_SIZE = 4 << 20
+
+
+def save_file_by_content(file, directory: str, prefix: str) -> str:
+    """Save an upload under a digest of its content and return the path.
+
+    If a file with the same content was uploaded before, the existing file is
+    reused and the new copy discarded.
+    """
+    extension = os.path.splitext(file.filename)[1]
+    hasher = _content_hasher()
+    tmp_path = os.path.join(directory, f"{prefix}_{os.urandom(8).hex()}.part")
+    try:
+        with open(tmp_path, 'wb') as out:
+            while chunk := file.stream.read(COPY_BUFFER_SIZE):
+                hasher.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+
+        filepath = os.path.join(directory, f"{prefix}_{hasher.hexdigest()}{extension}")
+        if os.path.exists(filepath):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, filepath)
+        return filepath
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+
+def prune_files(directory: str, prefix: str, max_files: int, keep: str = None) -> None:
+    """Delete the oldest files in directory whose name starts with prefix, beyond max_files.
+
+    In-progress ``.part`` uploads and the path given as keep are never deleted.
+    """
+    with os.scandir(directory) as entries:
+        files = sorted(
+            (entry for entry in entries
+             if entry.name.startswith(prefix) and not entry.name.endswith('.part')
+             and entry.path != keep and entry.is_file()),
+            key=lambda entry: entry.stat().st_mtime_ns
+        )
+    n_kept = max_files - (1 if keep is not None else 0)
+    for entry in files[:max(len(files) - n_kept, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            # Already pruned by another process
+            pass
+
+def read_csv_fast(filepath: str, **kwargs) -> pd.DataFrame:
+    """Read a whole CSV file with the multithreaded pyarrow parser when available.
+
+    The pyarrow engine does not support nrows/chunksize, so partial reads
+    keep using the default parser.
+    """
+    try:
+        return pd.read_csv(filepath, engine='pyarrow', **kwargs)
+    except ImportError:
+        return pd.read_csv(filepath, **kwargs)
+
+
+def read_excel_fast(filepath: str, **kwargs) -> pd.DataFrame:
+    """Read an Excel file with the Rust calamine reader, falling back to the default engine."""
+    try:
+        return pd.read_excel(filepath, engine='calamine', **kwargs)
+    except ImportError:
+        return pd.read_excel(filepath, **kwargs)
+
+
+def count_csv_rows(filepath: str) -> int:
+    """Count the data rows of a CSV file without parsing it."""
+    newlines = 0
+    last = b'\n'
+    with open(filepath, 'rb') as f:
+        while block := f.read(1 << 20):
+            newlines += block.count(b'\n')
+            last = block[-1:]
+    # A final line without a trailing newline still holds a row; the header does not
+    rows = newlines + (last != b'\n')
+    return max(rows - 1, 0)
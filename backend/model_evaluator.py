@@ -1,186 +1,670 @@
 import numpy as np
 import tensorflow as tf
 import torch
+import onnxruntime as ort
 import os
 import pickle
-from typing import Dict, Any, Union, Tuple
+import joblib
+import warnings
+import logging
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Union, Tuple
+from dataclasses import dataclass, field
 import pandas as pd
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from sklearn.metrics import precision_recall_fscore_support, r2_score, mean_squared_error
+from collections import OrderedDict
+from uuid import uuid4
+from file_utils import save_file_by_content, prune_files, read_csv_fast, read_excel_fast, count_csv_rows
+
+# Number of loaded models and parsed datasets kept in memory
+MODEL_CACHE_SIZE = 8
+DATASET_CACHE_SIZE = 4
+# CSV files above this size are loaded chunk by chunk to bound peak memory
+STREAMING_THRESHOLD_BYTES = 512 * 1024 * 1024
+DATASET_CHUNKSIZE = 200_000
+# Rows sampled to infer column dtypes for dataset info
+SCHEMA_SAMPLE_ROWS = 1000
+# Larger prediction arrays are written to disk instead of the response
+INLINE_PREDICTIONS_LIMIT = 10_000
+# Saved prediction files kept for download; older ones are deleted
+MAX_SAVED_PREDICTIONS = 100
+# Uploaded files kept per type (e.g. models); the oldest are deleted
+MAX_STORED_UPLOADS = int(os.environ.get('MAX_STORED_UPLOADS', 50))
+# Rows per forward pass when predicting with TF/Torch models
+PREDICT_BATCH_SIZE = 1024
+# Quantize ONNX models to int8 weights before creating their session
+ONNX_QUANTIZE = os.environ.get('ONNX_QUANTIZE') == '1'
+# Allow Torch files that only load with the unrestricted unpickler (trusted uploads only)
+ALLOW_PICKLED_TORCH_MODELS = os.environ.get('ALLOW_PICKLED_TORCH_MODELS') == '1'
+# Worker processes used to evaluate several models at once
+EVALUATION_WORKERS = int(os.environ.get('EVALUATION_WORKERS', 2))
+
+# Per-step progress is logged at DEBUG; set EVALUATOR_LOG_LEVEL=DEBUG to see it
+log = logging.getLogger(__name__)
+log.setLevel(os.environ.get('EVALUATOR_LOG_LEVEL', 'INFO').upper())
+
+
+def _file_key(path: str) -> Tuple[str, int, int]:
+    """Identify a file by path, modification time and size."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+# Flask serves requests from several threads; the LRU caches are shared
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: OrderedDict, key):
+    """Look up key in an LRU cache, marking it as most recently used."""
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value, maxsize: int):
+    """
+    Store value in an LRU cache, evicting the least recently used entries.
+    
+    If another thread stored the key first, its value is kept and returned so
+    both callers share one object.
+    """
+    with _cache_lock:
+        value = cache.setdefault(key, value)
+        cache.move_to_end(key)
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
+        return value
+
+
+def _to_shared_memory(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, Tuple[str, Tuple[int, ...], str]]:
+    """Copy an array into a new shared memory block and return it with its (name, shape, dtype)."""
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_shared_memory(spec: Tuple[str, Tuple[int, ...], str]) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Attach to a shared memory block and view it as a read-only array."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    array.flags.writeable = False
+    return shm, array
+
+
+# Evaluator of a batch evaluation worker process, keeping its own model cache
+_worker_evaluator = None
+
+
+def _init_batch_worker():
+    """Set up a batch evaluation worker with single-threaded TF/Torch ops."""
+    global _worker_evaluator
+    # Workers run side by side; more intra-op threads would oversubscribe the cores
+    os.environ['TF_NUM_INTRAOP_THREADS'] = '1'
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    torch.set_num_threads(1)
+    _worker_evaluator = ModelEvaluator()
+
+
+def _evaluate_shared(model_path: str, x_spec, y_spec, inline_predictions: bool = None,
+                     classes: np.ndarray = None) -> Dict[str, Any]:
+    """Evaluate one model on the feature and label arrays shared by the parent process."""
+    x_shm, X = _attach_shared_memory(x_spec)
+    y_shm, y = _attach_shared_memory(y_spec)
+    try:
+        return _worker_evaluator._evaluate_arrays(model_path, X, y, inline_predictions, classes)
+    except Exception as e:
+        log.error("Error evaluating %s: %s", model_path, e)
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+    finally:
+        # Views into the buffers must be released before closing them
+        del X, y
+        x_shm.close()
+        y_shm.close()
+
+
+def _missing_flags(df: pd.DataFrame) -> List[bool]:
+    """Per-column has-missing flags, skipping columns whose dtype cannot hold missing values."""
+    flags = []
+    for _, column in df.items():
+        values = column.to_numpy()
+        if values.dtype.kind == 'f':
+            flags.append(bool(np.isnan(values).any()))
+        elif values.dtype.kind in 'biu':
+            flags.append(False)
+        else:
+            flags.append(bool(column.isna().any()))
+    return flags
+
+
+def _encode_target(y: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Sorted factorize codes and classes of an object target; other targets are returned as is."""
+    if y.dtype != object:
+        return y, None
+    # Sorted factorize gives the same codes as pd.Categorical
+    codes, classes = pd.factorize(y, sort=True)
+    return codes, np.asarray(classes, dtype=object)
+
+
+@dataclass
+class _DatasetHandle:
+    """Parsed frame, encoded arrays per target column and info of one dataset file."""
+    path: str
+    df: Optional[pd.DataFrame] = None
+    arrays: Dict[Optional[str], Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = field(default_factory=dict)
+    info: Optional[Dict[str, Any]] = None
+
 
 class ModelEvaluator:
     def __init__(self):
         self.supported_formats = ['.h5', '.pt', '.pth', '.pkl', '.onnx']
         self.upload_dir = 'uploads'
+        self.predictions_dir = os.path.join(self.upload_dir, 'predictions')
         os.makedirs(self.upload_dir, exist_ok=True)
+        # Keyed by (path, mtime, size) so a changed file is loaded again
+        self._model_cache = OrderedDict()
+        self._argmax_models = OrderedDict()
+        self._dataset_cache = OrderedDict()
+        self._batch_executor = None
+        self._lock = threading.Lock()
 
-    def load_model(self, model_path: str) -> Union[tf.keras.Model, torch.nn.Module]:
-        """Load a model from file based on its extension."""
+    def load_model(self, model_path: str) -> Union[tf.keras.Model, torch.nn.Module, ort.InferenceSession]:
+        """Load a model from file based on its extension, reusing cached models."""
+        key = _file_key(model_path)
+        model = _cache_get(self._model_cache, key)
+        if model is None:
+            model = _cache_put(self._model_cache, key, self._load_model_file(model_path), MODEL_CACHE_SIZE)
+        return model
+
+    def _load_model_file(self, model_path: str) -> Union[tf.keras.Model, torch.nn.Module, ort.InferenceSession]:
+        """Deserialize a model file based on its extension."""
         try:
             if model_path.endswith('.h5'):
                 return tf.keras.models.load_model(model_path)
             elif model_path.endswith(('.pt', '.pth')):
-                return torch.load(model_path)
+                # Memory-map tensor storages so pages are loaded on demand, and
+                # place them on the inference device directly instead of moving
+                # a CPU copy later
+                device = 'cuda' if torch.cuda.is_available() else 'cpu'
+                try:
+                    # weights_only refuses to run arbitrary code from the file
+                    return torch.load(model_path, map_location=device, mmap=True, weights_only=True)
+                except pickle.UnpicklingError as e:
+                    # Whole pickled nn.Module files need the unrestricted unpickler,
+                    # which runs arbitrary code from the file; only used when the
+                    # deployment trusts its uploads
+                    if not ALLOW_PICKLED_TORCH_MODELS:
+                        raise ValueError(
+                            "Torch model could not be loaded with weights_only=True; "
+                            "set ALLOW_PICKLED_TORCH_MODELS=1 to load trusted pickled modules"
+                        ) from e
+                    return torch.load(model_path, map_location=device, mmap=True)
             elif model_path.endswith('.pkl'):
-                with open(model_path, 'rb') as f:
-                    return pickle.load(f)
+                # Large numpy arrays inside joblib dumps are memory-mapped, not copied
+                return joblib.load(model_path, mmap_mode='r')
             elif model_path.endswith('.onnx'):
-                # Add ONNX loading logic here if needed
-                raise NotImplementedError("ONNX support not yet implemented")
+                return self._load_onnx_session(model_path)
             else:
                 raise ValueError(f"Unsupported model format. Supported formats: {self.supported_formats}")
         except Exception as e:
-            print(f"Error loading model from {model_path}: {str(e)}")
+            log.error("Error loading model from %s: %s", model_path, e)
             raise
 
-    def load_dataset(self, dataset_path: str, target_column: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    def _load_onnx_session(self, model_path: str) -> ort.InferenceSession:
+        """Create an ONNX Runtime session with all graph optimizations enabled."""
+        if ONNX_QUANTIZE:
+            # Int8 weights with dynamically quantized activations, converted once per file
+            quantized_path = os.path.splitext(model_path)[0] + '.int8.onnx'
+            if not os.path.exists(quantized_path):
+                # The quantization tooling needs the onnx package, so it is only
+                # imported when quantization is enabled
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+            model_path = quantized_path
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        available = ort.get_available_providers()
+        providers = [p for p in ('CUDAExecutionProvider', 'CPUExecutionProvider') if p in available]
+        return ort.InferenceSession(model_path, session_options, providers=providers)
+
+    def _read_frame(self, dataset_path: str) -> pd.DataFrame:
+        """Parse a CSV or Excel file based on its extension."""
+        if dataset_path.endswith('.csv'):
+            return read_csv_fast(dataset_path)
+        elif dataset_path.endswith(('.xlsx', '.xls')):
+            return read_excel_fast(dataset_path)
+        else:
+            raise ValueError("Unsupported dataset format. Supported formats: .csv, .xlsx, .xls")
+
+    def _get_handle(self, dataset_path: str) -> _DatasetHandle:
+        """Cached handle of a dataset file, shared by load_dataset and get_dataset_info."""
+        key = _file_key(dataset_path)
+        handle = _cache_get(self._dataset_cache, key)
+        if handle is None:
+            handle = _cache_put(self._dataset_cache, key, _DatasetHandle(dataset_path), DATASET_CACHE_SIZE)
+        return handle
+
+    def _frame(self, handle: _DatasetHandle) -> pd.DataFrame:
+        """Parsed frame of a dataset handle, parsing the file on first use."""
+        if handle.df is None:
+            handle.df = self._read_frame(handle.path)
+        return handle.df
+
+    def load_dataset(self, dataset_path: str, target_column: str = None,
+                     chunksize: int = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Load and preprocess dataset from CSV or Excel file.
         
         Args:
             dataset_path: Path to the dataset file
             target_column: Name of the target column. If None, uses the last column.
+            chunksize: Stream a CSV file in chunks of this many rows. Large CSV
+                files are streamed even when this is not given.
         """
+        X, y, _ = self._load_encoded(dataset_path, target_column, chunksize)
+        return X, y
+
+    def _load_encoded(self, dataset_path: str, target_column: str = None,
+                      chunksize: int = None) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Encoded features, target codes and the sorted classes of an object target (else None)."""
         try:
-            print(f"Loading dataset from: {dataset_path}")
+            log.debug("Loading dataset from: %s", dataset_path)
+            
+            # Reuse the preprocessed arrays if this file was already loaded
+            handle = self._get_handle(dataset_path)
+            if target_column in handle.arrays:
+                return handle.arrays[target_column]
             
-            # Load the dataset based on file extension
-            if dataset_path.endswith('.csv'):
-                df = pd.read_csv(dataset_path)
-            elif dataset_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(dataset_path)
+            if dataset_path.endswith('.csv') and (
+                    chunksize is not None or os.path.getsize(dataset_path) > STREAMING_THRESHOLD_BYTES):
+                X, y = self._stream_csv_arrays(dataset_path, target_column, chunksize or DATASET_CHUNKSIZE)
             else:
-                raise ValueError("Unsupported dataset format. Supported formats: .csv, .xlsx, .xls")
+                X, y = self._frame_to_arrays(self._frame(handle), target_column)
+            y, classes = _encode_target(y)
 
-            print(f"Dataset loaded successfully. Shape: {df.shape}")
-            print(f"Available columns: {list(df.columns)}")
+            log.debug("Dataset preprocessing completed successfully")
+            # Cached arrays are shared between calls, so hand them out read-only
+            X.setflags(write=False)
+            y.setflags(write=False)
+            handle.arrays[target_column] = (X, y, classes)
+            return X, y, classes
+            
+        except Exception as e:
+            log.error("Error loading dataset: %s", e)
+            raise ValueError(f"Failed to load dataset: {str(e)}")
 
-            # Basic dataset validation
-            if df.empty:
-                raise ValueError("Dataset is empty")
+    def _frame_to_arrays(self, df: pd.DataFrame, target_column: str = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Split a parsed frame into encoded feature and label arrays."""
+        log.debug("Dataset loaded successfully. Shape: %s", df.shape)
+        log.debug("Available columns: %s", list(df.columns))
 
-            if df.shape[1] < 2:
-                raise ValueError("Dataset must have at least two columns (features and target)")
+        # Basic dataset validation
+        if df.empty:
+            raise ValueError("Dataset is empty")
 
-            # Handle target column selection
-            if target_column is not None:
-                if target_column not in df.columns:
-                    raise ValueError(f"Target column '{target_column}' not found in dataset. Available columns: {list(df.columns)}")
-                # Extract target and remove it from features
-                y = df[target_column].values
-                X = df.drop(columns=[target_column])
-            else:
-                # Default behavior: use last column as target
-                print("No target column specified, using last column as target")
-                X = df.iloc[:, :-1]
-                y = df.iloc[:, -1].values
+        if df.shape[1] < 2:
+            raise ValueError("Dataset must have at least two columns (features and target)")
 
-            print(f"Features shape: {X.shape}, Labels shape: {y.shape}")
-            
-            # Handle categorical variables in features
-            categorical_columns = X.select_dtypes(include=['object']).columns
-            for column in categorical_columns:
-                X[column] = pd.Categorical(X[column]).codes
-            
-            # Convert to numpy array
-            X = X.values
-            
-            # Basic feature validation
-            if not isinstance(X, np.ndarray):
-                X = np.array(X)
-            if not isinstance(y, np.ndarray):
-                y = np.array(y)
-
-            # Convert features to float type
-            X = X.astype(float)
-            
-            # Handle categorical target if needed
-            if y.dtype == object:
-                y = pd.Categorical(y).codes
+        # Handle target column selection
+        if target_column is not None:
+            if target_column not in df.columns:
+                raise ValueError(f"Target column '{target_column}' not found in dataset. Available columns: {list(df.columns)}")
+            target_index = df.columns.get_loc(target_column)
+        else:
+            # Default behavior: use last column as target
+            log.debug("No target column specified, using last column as target")
+            target_index = df.shape[1] - 1
+        y = df.iloc[:, target_index].to_numpy()
+        feature_positions = [i for i in range(df.shape[1]) if i != target_index]
 
-            print("Dataset preprocessing completed successfully")
-            return X, y
-            
-        except Exception as e:
-            print(f"Error loading dataset: {str(e)}")
-            raise ValueError(f"Failed to load dataset: {str(e)}")
+        log.debug("Features shape: %s, Labels shape: %s", (len(df), len(feature_positions)), y.shape)
+        
+        # Convert to a float32 numpy array (the input dtype of TF/Torch models)
+        # in one pass, writing each feature column of the frame directly into
+        # the output instead of copying the frame without the target first
+        X = np.empty((len(df), len(feature_positions)), dtype=np.float32)
+        for j, position in enumerate(feature_positions):
+            values = df.iloc[:, position].to_numpy()
+            if values.dtype == object or values.dtype.kind == 'M':
+                # Sorted factorize gives the same codes as pd.Categorical. The
+                # pyarrow parser reads timestamps as datetime64 where the C parser
+                # of the streamed path keeps text; both are encoded as codes
+                values = pd.factorize(values, sort=True)[0]
+            X[:, j] = values
+        
+        return X, y
+
+    def _stream_csv_arrays(self, dataset_path: str, target_column: str,
+                           chunksize: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode a CSV chunk by chunk into a preallocated float32 feature array."""
+        # First pass: row count, column layout and the values of categorical columns
+        n_rows = 0
+        columns = None
+        categorical_values = {}
+        for chunk in pd.read_csv(dataset_path, chunksize=chunksize):
+            if columns is None:
+                columns = list(chunk.columns)
+            n_rows += len(chunk)
+            for column in chunk.select_dtypes(include=['object']).columns:
+                categorical_values.setdefault(column, set()).update(chunk[column].dropna().unique())
+
+        log.debug("Dataset scanned successfully. Shape: %s", (n_rows, len(columns or [])))
+
+        # Basic dataset validation
+        if n_rows == 0:
+            raise ValueError("Dataset is empty")
+
+        if len(columns) < 2:
+            raise ValueError("Dataset must have at least two columns (features and target)")
+
+        # Handle target column selection
+        if target_column is None:
+            log.debug("No target column specified, using last column as target")
+            target_column = columns[-1]
+        elif target_column not in columns:
+            raise ValueError(f"Target column '{target_column}' not found in dataset. Available columns: {columns}")
+        feature_columns = [column for column in columns if column != target_column]
+
+        # Sorted codes match pd.factorize(sort=True) on the fully loaded column
+        code_maps = {
+            column: pd.Index(pd.factorize(np.array(list(values), dtype=object), sort=True)[1])
+            for column, values in categorical_values.items()
+        }
+
+        # Second pass: encode each chunk straight into the output array
+        X = np.empty((n_rows, len(feature_columns)), dtype=np.float32)
+        y_chunks = []
+        offset = 0
+        for chunk in pd.read_csv(dataset_path, chunksize=chunksize):
+            for column, codes in code_maps.items():
+                chunk[column] = codes.get_indexer(chunk[column])
+            X[offset:offset + len(chunk)] = chunk[feature_columns].to_numpy(dtype=np.float32)
+            y_chunks.append(chunk[target_column].to_numpy())
+            offset += len(chunk)
+
+        log.debug("Features shape: %s, Labels shape: %s", X.shape, (n_rows,))
+        return X, np.concatenate(y_chunks)
 
     def get_dataset_info(self, dataset_path: str) -> Dict[str, Any]:
         """Get information about the dataset including column names."""
         try:
-            print(f"Reading dataset info from: {dataset_path}")
+            log.debug("Reading dataset info from: %s", dataset_path)
             
-            # Load the dataset based on file extension
-            if dataset_path.endswith('.csv'):
-                df = pd.read_csv(dataset_path)
-            elif dataset_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(dataset_path)
-            else:
-                raise ValueError("Unsupported dataset format. Supported formats: .csv, .xlsx, .xls")
-
-            # Get basic dataset information
-            info = {
-                'columns': list(df.columns),
-                'shape': df.shape,
-                'dtypes': df.dtypes.astype(str).to_dict(),
-                'has_missing_values': df.isnull().any().tolist(),
-                'numeric_columns': list(df.select_dtypes(include=['int64', 'float64']).columns)
-            }
+            # The info is cached on the handle shared with load_dataset
+            handle = self._get_handle(dataset_path)
+            if handle.info is None:
+                if dataset_path.endswith('.csv'):
+                    # Always scanned, even when load_dataset already parsed the
+                    # file: its pyarrow parser infers other dtypes (e.g. timestamps)
+                    # than the sample, and the result must not depend on call order
+                    handle.info = self._scan_csv_info(dataset_path)
+                else:
+                    df = self._frame(handle)
+                    # Get basic dataset information
+                    handle.info = {
+                        'columns': list(df.columns),
+                        'shape': df.shape,
+                        'dtypes': df.dtypes.astype(str).to_dict(),
+                        'has_missing_values': _missing_flags(df),
+                        'numeric_columns': list(df.select_dtypes(include=['int64', 'float64']).columns)
+                    }
             
-            return info
+            return handle.info
         except Exception as e:
-            print(f"Error getting dataset info: {str(e)}")
+            log.error("Error getting dataset info: %s", e)
             raise ValueError(f"Failed to get dataset info: {str(e)}")
 
-    def evaluate_model(self, model_path: str, dataset_path: str, target_column: str = None) -> Dict[str, Any]:
-        """Evaluate a model on a given dataset."""
+    def _scan_csv_info(self, dataset_path: str) -> Dict[str, Any]:
+        """Dataset info for a CSV file without holding the whole file in memory."""
+        # Column dtypes are inferred from a sample; rows are counted without parsing
+        sample = pd.read_csv(dataset_path, nrows=SCHEMA_SAMPLE_ROWS)
+        shape = (count_csv_rows(dataset_path), sample.shape[1])
+
+        return {
+            'columns': list(sample.columns),
+            'shape': shape,
+            'dtypes': sample.dtypes.astype(str).to_dict(),
+            'has_missing_values': self._scan_csv_missing(dataset_path, sample.shape[1]).tolist(),
+            'numeric_columns': list(sample.select_dtypes(include=['int64', 'float64']).columns)
+        }
+
+    def _scan_csv_missing(self, dataset_path: str, n_columns: int) -> np.ndarray:
+        """Per-column has-missing flags of a CSV file, read batch by batch."""
+        has_missing = np.zeros(n_columns, dtype=bool)
         try:
-            # Load model and dataset
-            print(f"Loading model from {model_path}")
-            model = self.load_model(model_path)
-            print(f"Loading dataset from {dataset_path} with target column: {target_column}")
-            X, y = self.load_dataset(dataset_path, target_column)
-
-            # Make predictions
-            print("Making predictions...")
-            if isinstance(model, tf.keras.Model):
-                predictions = model.predict(X)
-                predictions = np.argmax(predictions, axis=1)
-            elif isinstance(model, torch.nn.Module):
-                model.eval()
-                with torch.no_grad():
-                    X_tensor = torch.FloatTensor(X)
-                    predictions = model(X_tensor)
-                    predictions = torch.argmax(predictions, dim=1).numpy()
-            else:  # Handle scikit-learn or similar models (including pickled models)
-                try:
-                    # Try predict_proba first for classifiers
-                    predictions = model.predict_proba(X)
-                    predictions = np.argmax(predictions, axis=1)
-                except (AttributeError, NotImplementedError):
-                    # Fall back to regular predict for other models
-                    predictions = model.predict(X)
-
-            # Calculate metrics
-            print("Calculating metrics...")
-            metrics = {
-                'accuracy': float(accuracy_score(y, predictions)),
-                'precision': float(precision_score(y, predictions, average='weighted')),
-                'recall': float(recall_score(y, predictions, average='weighted')),
-                'f1_score': float(f1_score(y, predictions, average='weighted'))
-            }
+            # The null counts of Arrow batches come from their validity bitmaps
+            convert_options = pa_csv.ConvertOptions(strings_can_be_null=True)
+            with pa_csv.open_csv(dataset_path, convert_options=convert_options) as reader:
+                for batch in reader:
+                    has_missing |= [column.null_count > 0 for column in batch.columns]
+        except pa.ArrowInvalid:
+            # Column types inferred from the first batch may not fit later ones
+            has_missing[:] = False
+            for chunk in pd.read_csv(dataset_path, chunksize=DATASET_CHUNKSIZE):
+                has_missing |= _missing_flags(chunk)
+        return has_missing
 
+    def evaluate_model(self, model_path: str, dataset_path: str, target_column: str = None,
+                       inline_predictions: bool = None) -> Dict[str, Any]:
+        """
+        Evaluate a model on a given dataset.
+        
+        Predictions are returned inline when inline_predictions is True, or when
+        it is None and there are at most INLINE_PREDICTIONS_LIMIT of them;
+        otherwise they are saved to an .npy file in predictions_dir whose name
+        is returned.
+        """
+        try:
+            log.debug("Loading dataset from %s with target column: %s", dataset_path, target_column)
+            X, y, classes = self._load_encoded(dataset_path, target_column)
+            return self._evaluate_arrays(model_path, X, y, inline_predictions, classes)
+        except Exception as e:
+            log.error("Error during model evaluation: %s", e)
             return {
-                'status': 'success',
-                'metrics': metrics,
-                'predictions': predictions.tolist()
+                'status': 'error',
+                'message': str(e)
             }
+
+    def batch_evaluate(self, model_paths: List[str], dataset_path: str, target_column: str = None,
+                       inline_predictions: bool = None) -> Dict[str, Any]:
+        """
+        Evaluate several models on the same dataset in parallel worker processes.
+        
+        The dataset is encoded once and shared with the workers through shared
+        memory; the result of each model is keyed by its path.
+        """
+        try:
+            log.debug("Loading dataset from %s with target column: %s", dataset_path, target_column)
+            X, y, classes = self._load_encoded(dataset_path, target_column)
         except Exception as e:
-            print(f"Error during model evaluation: {str(e)}")
+            log.error("Error during batch evaluation: %s", e)
             return {
                 'status': 'error',
                 'message': str(e)
             }
 
+        x_shm, x_spec = _to_shared_memory(X)
+        y_shm, y_spec = _to_shared_memory(y)
+        try:
+            executor = self._get_batch_executor()
+            futures = {
+                path: executor.submit(_evaluate_shared, path, x_spec, y_spec, inline_predictions, classes)
+                for path in model_paths
+            }
+            results = {path: future.result() for path, future in futures.items()}
+        except BrokenProcessPool as e:
+            # A crashed worker breaks the pool for good; start a fresh one next time
+            log.error("Batch evaluation worker crashed: %s", e)
+            with self._lock:
+                if self._batch_executor is executor:
+                    self._batch_executor = None
+            executor.shutdown(wait=False)
+            return {
+                'status': 'error',
+                'message': f"Evaluation worker crashed: {str(e)}"
+            }
+        finally:
+            for shm in (x_shm, y_shm):
+                shm.close()
+                shm.unlink()
+        return {
+            'status': 'success',
+            'results': results
+        }
+
+    def _get_batch_executor(self) -> ProcessPoolExecutor:
+        """Process pool for batch evaluation, started on first use."""
+        with self._lock:
+            if self._batch_executor is None:
+                # Spawned workers start with a fresh TF/Torch runtime instead of a forked one
+                self._batch_executor = ProcessPoolExecutor(
+                    max_workers=EVALUATION_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_batch_worker
+                )
+            return self._batch_executor
+
+    def _evaluate_arrays(self, model_path: str, X: np.ndarray, y: np.ndarray,
+                         inline_predictions: bool = None, classes: np.ndarray = None) -> Dict[str, Any]:
+        """
+        Predict with a model on encoded arrays and compute its metrics.
+        
+        classes are the sorted labels behind the codes in y when the target
+        column held strings.
+        """
+        log.debug("Loading model from %s", model_path)
+        model = self.load_model(model_path)
+
+        # Make predictions
+        log.debug("Making predictions...")
+        is_regressor = False
+        if isinstance(model, tf.keras.Model):
+            predictions = self._predict_tf(model_path, model, X)
+        elif isinstance(model, torch.nn.Module):
+            predictions = self._predict_torch(model, X)
+        elif isinstance(model, ort.InferenceSession):
+            predictions = self._predict_onnx(model, X)
+        else:  # Handle scikit-learn or similar models (including pickled models)
+            # predict() already returns class labels for classifiers; regressors
+            # are scored with regression metrics below
+            is_regressor = getattr(model, '_estimator_type', None) == 'regressor'
+            predictions = model.predict(X)
+            if classes is not None and predictions.dtype.kind in 'OUS':
+                # Classifiers trained on string labels predict those labels; y holds
+                # their codes, so map them into the same code space (unknown -> -1)
+                predictions = pd.Index(classes).get_indexer(predictions)
+
+        # Calculate metrics
+        log.debug("Calculating metrics...")
+        if is_regressor:
+            metrics = {
+                'r2_score': float(r2_score(y, predictions)),
+                'mean_squared_error': float(mean_squared_error(y, predictions))
+            }
+        else:
+            # One pass for the weighted scores; accuracy does not need label validation
+            precision, recall, f1, _ = precision_recall_fscore_support(
+                y, predictions, average='weighted', zero_division=0
+            )
+            metrics = {
+                'accuracy': float(np.mean(y == predictions)),
+                'precision': float(precision),
+                'recall': float(recall),
+                'f1_score': float(f1)
+            }
+
+        result = {
+            'status': 'success',
+            'metrics': metrics,
+            'n_predictions': len(predictions)
+        }
+        if inline_predictions is None:
+            inline_predictions = len(predictions) <= INLINE_PREDICTIONS_LIMIT
+        if inline_predictions:
+            result['predictions'] = predictions.tolist()
+        else:
+            # Large results go to disk instead of being serialized into the response
+            result['predictions_file'] = self._save_predictions(predictions)
+        return result
+
+    def _save_predictions(self, predictions: np.ndarray) -> str:
+        """Save predictions to an .npy file in predictions_dir and return its file name."""
+        os.makedirs(self.predictions_dir, exist_ok=True)
+        if predictions.dtype.kind in 'iub':
+            predictions = predictions.astype(np.int32)
+        filename = f"predictions_{uuid4().hex}.npy"
+        np.save(os.path.join(self.predictions_dir, filename), predictions)
+        prune_files(self.predictions_dir, 'predictions_', MAX_SAVED_PREDICTIONS)
+        return filename
+
+    def _predict_tf(self, model_path: str, model: tf.keras.Model, X: np.ndarray) -> np.ndarray:
+        """Predict class labels with a Keras model, taking the argmax inside the graph."""
+        key = _file_key(model_path)
+        argmax_model = _cache_get(self._argmax_models, key)
+        if argmax_model is None and model.inputs is not None:
+            # Only the (N,) labels reach host memory instead of the (N, C) scores
+            argmax_model = _cache_put(self._argmax_models, key, tf.keras.Model(
+                model.inputs, tf.argmax(model.outputs[0], axis=1, output_type=tf.int32)
+            ), MODEL_CACHE_SIZE)
+        if argmax_model is None:
+            # Subclassed models have no symbolic outputs to build the argmax model from
+            return np.argmax(model.predict(X, batch_size=PREDICT_BATCH_SIZE, verbose=0), axis=1)
+        return argmax_model.predict(X, batch_size=PREDICT_BATCH_SIZE, verbose=0)
+
+    def _predict_torch(self, model: torch.nn.Module, X: np.ndarray) -> np.ndarray:
+        """Predict class labels with a Torch model in mini-batches."""
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        model.to(device)
+        model.eval()
+        # Feed half precision models half precision inputs
+        param = next(model.parameters(), None)
+        dtype = np.float16 if param is not None and param.dtype == torch.float16 else np.float32
+        with warnings.catch_warnings():
+            # The cached feature array is read-only; the tensor is never written to
+            warnings.filterwarnings('ignore', message='The given NumPy array is not writable')
+            X_tensor = torch.from_numpy(np.ascontiguousarray(X, dtype=dtype))
+        if device.type == 'cuda':
+            # Pinned host memory lets the batch copies run asynchronously
+            X_tensor = X_tensor.pin_memory()
+
+        predictions = []
+        with torch.inference_mode():
+            for start in range(0, len(X_tensor), PREDICT_BATCH_SIZE):
+                batch = X_tensor[start:start + PREDICT_BATCH_SIZE].to(device, non_blocking=True)
+                predictions.append(torch.argmax(model(batch), dim=1).cpu())
+        return torch.cat(predictions).numpy()
+
+    def _predict_onnx(self, session: ort.InferenceSession, X: np.ndarray) -> np.ndarray:
+        """Predict class labels with an ONNX Runtime session in mini-batches."""
+        model_input = session.get_inputs()[0]
+        # Models exported with a fixed batch dimension are fed batches of that size
+        fixed_batch = isinstance(model_input.shape[0], int)
+        batch_size = model_input.shape[0] if fixed_batch else PREDICT_BATCH_SIZE
+        X = np.ascontiguousarray(X, dtype=np.float32)
+
+        predictions = []
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            n_rows = len(batch)
+            if fixed_batch and n_rows < batch_size:
+                # Pad the last batch up to the fixed size and drop the padded rows' output
+                batch = np.concatenate([batch, np.zeros((batch_size - n_rows,) + batch.shape[1:], dtype=batch.dtype)])
+            output = session.run(None, {model_input.name: batch})[0][:n_rows]
+            # Converted classifiers (e.g. skl2onnx) output labels rather than scores
+            predictions.append(output if output.ndim == 1 else output.argmax(axis=1))
+        return np.concatenate(predictions)
+
     def save_uploaded_file(self, file, file_type: str) -> str:
         """Save uploaded file and return its path."""
         try:
@@ -188,14 +672,12 @@ class ModelEvaluator:
             type_dir = os.path.join(self.upload_dir, file_type + 's')
             os.makedirs(type_dir, exist_ok=True)
 
-            # Generate unique filename
-            filename = f"{file_type}_{os.urandom(8).hex()}{os.path.splitext(file.filename)[1]}"
-            filepath = os.path.join(type_dir, filename)
-            
-            print(f"Saving {file_type} file to: {filepath}")
-            file.save(filepath)
+            # Name the file after its content so re-uploads reuse the same path
+            filepath = save_file_by_content(file, type_dir, file_type)
+            log.debug("Saved %s file to: %s", file_type, filepath)
+            prune_files(type_dir, f"{file_type}_", MAX_STORED_UPLOADS, keep=filepath)
             
             return filepath
         except Exception as e:
-            print(f"Error saving uploaded file: {str(e)}")
+            log.error("Error saving uploaded file: %s", e)
             raise 
\ No newline at end of file
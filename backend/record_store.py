@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Any, List
+
+import orjson
+
+
+class RecordStore:
+    """Append-only log of JSON records in SQLite, shared by every process using the file."""
+
+    def __init__(self, db_path: str, table: str, maxlen: int = 10_000):
+        self.db_path = db_path
+        self.table = table
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+
+    def append(self, record: Any) -> None:
+        """Persist a record."""
+        data = orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY)
+        with self._lock, closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute(f"INSERT INTO {self.table} (data) VALUES (?)", (data,))
+
+    def latest(self) -> List[Any]:
+        """Return the newest maxlen records in insertion order."""
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute(
+                f"SELECT data FROM {self.table} ORDER BY id DESC LIMIT ?", (self.maxlen,)
+            ).fetchall()
+        return [orjson.loads(row[0]) for row in reversed(rows)]
+
+    def page(self, limit: int = -1, offset: int = 0) -> List[Any]:
+        """Return stored records in insertion order; a negative limit means no limit."""
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute(
+                f"SELECT data FROM {self.table} ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [orjson.loads(row[0]) for row in rows]
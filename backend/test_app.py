@@ -0,0 +1,19 @@
+import orjson
+import pandas as pd
+
+from app import app, ojsonify
+
+
+def test_ojsonify_serializes_pandas_timestamps():
+    with app.app_context():
+        response = ojsonify({'when': pd.Timestamp('2024-01-02 03:04:05'), 'missing': pd.NaT})
+    assert orjson.loads(response.get_data()) == {'when': '2024-01-02T03:04:05', 'missing': None}
+
+
+def test_ojsonify_serializes_preview_records_with_dates():
+    df = pd.DataFrame({'day': pd.to_datetime(['2024-01-01', None]), 'value': [1, 2]})
+    with app.app_context():
+        response = ojsonify({'preview': df.to_dict(orient='records')})
+    assert orjson.loads(response.get_data()) == {
+        'preview': [{'day': '2024-01-01T00:00:00', 'value': 1}, {'day': None, 'value': 2}]
+    }
@@ -0,0 +1,6 @@
+# Production entry point, e.g.:
+#   gunicorn -k gthread --workers 1 --threads 8 --bind 0.0.0.0:3000 wsgi:app
+# Use a single worker process: the uploaded dataset and training jobs are
+# held in process memory, so requests must all reach the same process.
+# Training itself runs in the app's own process pool.
+from app import app